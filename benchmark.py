@@ -9,18 +9,44 @@ Environment variables:
     JSON2XML_GO_CLI: Path to the json2xml-go binary
     JSON2XML_ZIG_CLI: Path to the json2xml-zig binary
     JSON2XML_EXAMPLES_DIR: Path to examples directory
+    XDG_CACHE_HOME: Generated fixtures are cached under json2xml-bench/ here
+    JSON2XML_BENCH_OUT: If set, results are also written to this JSON file
 """
 from __future__ import annotations
 
+import argparse
+import io
 import json
+import math
 import os
+import platform
 import random
+import statistics
 import string
 import subprocess
 import sys
 import tempfile
 import time
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait
 from pathlib import Path
+from typing import Callable, Iterator, TextIO
+
+try:
+    from json2xml.json2xml import Json2xml
+except ImportError:
+    Json2xml = None
+
+# Optional accelerators for fixture generation
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Base directory for repo-relative defaults
 BASE_DIR = Path(__file__).resolve().parent
@@ -44,137 +70,684 @@ class Colors:
     NC = "\033[0m"  # No Color
 
 
-def colorize(text: str, color: str) -> str:
-    """Wrap text in color codes."""
-    return f"{color}{text}{Colors.NC}"
+# Precomputed header rule, written as-is by print_header
+_BAR = f"{Colors.BLUE}{'=' * 60}{Colors.NC}\n"
+
+# Opened once and shared by every _fast_run child as its stdout/stderr
+_DEVNULL_FD = os.open(os.devnull, os.O_WRONLY)
+
+# CPUs allowed before _pin_and_prioritize narrowed the mask to one core
+_UNPINNED_CPUS: set[int] | None = None
+
+
+# Version of each fixture generator, part of the cache file name. Bump it
+# whenever a generator's output for a given seed changes.
+_FIXTURE_VERSIONS = {"np": 2, "py": 3}
+
+# Letters used for random strings, and a byte -> letter translation table
+_ALPHABET = string.ascii_letters.encode()
+_ALPHABET_TABLE = bytes(_ALPHABET[b % len(_ALPHABET)] for b in range(256))
+
 
+class _RandomPool:
+    """
+    Random ASCII letters drawn in bulk and handed out in slices.
+
+    Each refill takes one randbytes() call from the seeded rng and maps it to
+    letters with a single bytes.translate, replacing a random.choices call per
+    string. Output stays reproducible for a given seed.
+    """
+
+    def __init__(self, rng: random.Random, size: int = 1 << 16) -> None:
+        self.rng = rng
+        self.size = size
+        self._refill()
+
+    def _refill(self) -> None:
+        self.buf = self.rng.randbytes(self.size).translate(_ALPHABET_TABLE).decode("ascii")
+        self.pos = 0
 
-def random_string(length: int = 10) -> str:
-    """Generate a random string."""
-    return "".join(random.choices(string.ascii_letters, k=length))
+    def draw(self, n: int) -> str:
+        """Return n random letters."""
+        if self.pos + n > len(self.buf):
+            self._refill()
+        s = self.buf[self.pos:self.pos + n]
+        self.pos += n
+        return s
+
+
+def dumps(data: object) -> bytes:
+    """Serialize to compact UTF-8 JSON bytes, using orjson when available.
+
+    The json fallback mirrors orjson's output byte for byte, so fixture sizes
+    do not depend on which library is installed.
+    """
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
 
 
-def generate_large_json(num_records: int = 1000) -> str:
+def generate_large_json(num_records: int = 1000, seed: int | None = None) -> bytes:
     """Generate a large JSON file for benchmarking."""
+    if np is not None:
+        return _generate_large_json_numpy(num_records, seed)
+
+    rng = random.Random(seed)
+    pool = _RandomPool(rng)
     data = []
     for i in range(num_records):
         item = {
             "id": i,
-            "name": random_string(20),
-            "email": f"{random_string(8)}@example.com",
-            "active": random.choice([True, False]),
-            "score": round(random.uniform(0, 100), 2),
-            "tags": [random_string(5) for _ in range(5)],
+            "name": pool.draw(20),
+            "email": f"{pool.draw(8)}@example.com",
+            "active": rng.choice([True, False]),
+            "score": round(rng.uniform(0, 100), 2),
+            "tags": [pool.draw(5) for _ in range(5)],
             "metadata": {
                 "created": "2024-01-15T10:30:00Z",
                 "updated": "2024-01-15T12:45:00Z",
-                "version": random.randint(1, 100),
+                "version": rng.randint(1, 100),
                 "nested": {
                     "level1": {
-                        "level2": {"value": random_string(10)}
+                        "level2": {"value": pool.draw(10)}
                     }
                 },
             },
         }
         data.append(item)
-    return json.dumps(data)
+    return dumps(data)
+
+
+def _generate_large_json_numpy(num_records: int, seed: int | None = None) -> bytes:
+    """Generate the same record layout as generate_large_json with bulk numpy draws."""
+    rng = np.random.default_rng(seed)
+    alphabet = np.frombuffer(_ALPHABET, dtype=np.uint8)
+
+    # One row of letters per record: name(20) + email(8) + 5 tags(5) + value(10)
+    width = 20 + 8 + 5 * 5 + 10
+    letters = alphabet.take(rng.integers(0, len(alphabet), size=(num_records, width)))
+    text = letters.tobytes().decode("ascii")
+    active = rng.integers(0, 2, size=num_records).astype(bool).tolist()
+    scores = np.round(rng.uniform(0, 100, size=num_records), 2).tolist()
+    versions = rng.integers(1, 101, size=num_records).tolist()
+
+    data = []
+    for i in range(num_records):
+        row = text[i * width:(i + 1) * width]
+        data.append({
+            "id": i,
+            "name": row[:20],
+            "email": f"{row[20:28]}@example.com",
+            "active": active[i],
+            "score": scores[i],
+            "tags": [row[28 + t * 5:33 + t * 5] for t in range(5)],
+            "metadata": {
+                "created": "2024-01-15T10:30:00Z",
+                "updated": "2024-01-15T12:45:00Z",
+                "version": versions[i],
+                "nested": {
+                    "level1": {
+                        "level2": {"value": row[53:63]}
+                    }
+                },
+            },
+        })
+    return dumps(data)
+
+
+def get_or_create_fixture(num_records: int, cache_dir: Path, seed: int = 42) -> Path:
+    """
+    Return the path of a cached, seeded large JSON fixture.
+
+    The fixture is generated on first use and written atomically, so later
+    runs reuse identical input and skip generation entirely. The numpy and
+    pure-Python generators produce different data for the same seed, so the
+    generator kind and its version are part of the file name.
+    """
+    kind = "np" if np is not None else "py"
+    path = cache_dir / f"large_{num_records}_s{seed}_{kind}v{_FIXTURE_VERSIONS[kind]}.json"
+    if path.exists():
+        return path
+
+    # Write the encoded bytes straight to a raw fd: no text-mode wrapper or
+    # second encode of a multi-megabyte string.
+    buf = memoryview(generate_large_json(num_records, seed))
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    try:
+        try:
+            while buf:
+                buf = buf[os.write(fd, buf):]
+        finally:
+            os.close(fd)
+        # mkstemp creates 0600; os.chmod (unlike os.fchmod) works everywhere
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return path
+
+
+def summarize(times: list[int]) -> dict[str, float]:
+    """Reduce a list of timings to n, avg, min, max, p50 and p95 in one pass."""
+    if not times:
+        return {"n": 0, "avg": 0, "min": 0, "max": 0, "p50": 0, "p95": 0}
+
+    lo = hi = times[0]
+    total = 0
+    for t in times:
+        total += t
+        if t < lo:
+            lo = t
+        if t > hi:
+            hi = t
+
+    return {
+        "n": len(times),
+        "avg": total / len(times),
+        "min": lo,
+        "max": hi,
+        "p50": statistics.median(times),
+        "p95": statistics.quantiles(times, n=20, method="inclusive")[-1] if len(times) > 1 else hi,
+    }
+
+
+def sample(
+    run_once: Callable[[], int | None],
+    min_iters: int = 5,
+    max_iters: int = 50,
+    budget_s: float = 3.0,
+) -> list[int]:
+    """
+    Collect timings from run_once until the estimate is stable enough.
+
+    run_once returns one duration in nanoseconds, or None for a failed run.
+    Sampling stops after max_iters runs, or once at least min_iters samples
+    are in and either the time budget is spent or their standard deviation
+    is under 5% of their mean. Mean and variance are kept with Welford's
+    online algorithm.
+    """
+    times = []
+    mean = 0.0
+    m2 = 0.0
+    deadline = time.perf_counter_ns() + int(budget_s * 1_000_000_000)
+
+    for _ in range(max_iters):
+        duration_ns = run_once()
+        if duration_ns is not None:
+            times.append(duration_ns)
+            n = len(times)
+            delta = duration_ns - mean
+            mean += delta / n
+            m2 += delta * (duration_ns - mean)
+            if n >= min_iters and n > 1 and math.sqrt(m2 / (n - 1)) < 0.05 * mean:
+                break
+        if len(times) >= min_iters and time.perf_counter_ns() > deadline:
+            break
+
+    return times
+
+
+def _fast_run(argv: list[str], stdin_fd: int | None = None) -> int:
+    """
+    Run argv with stdout and stderr sent to /dev/null and return its exit code.
+
+    Uses os.posix_spawn directly where available, skipping the pipe, signal
+    and environment setup subprocess.Popen does on every call. If stdin_fd
+    is given it is rewound and handed to the child as stdin.
+    """
+    if stdin_fd is not None:
+        os.lseek(stdin_fd, 0, os.SEEK_SET)
+
+    if not hasattr(os, "posix_spawn"):
+        return subprocess.run(
+            argv, stdin=stdin_fd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False
+        ).returncode
+
+    file_actions = [
+        (os.POSIX_SPAWN_DUP2, _DEVNULL_FD, 1),
+        (os.POSIX_SPAWN_DUP2, _DEVNULL_FD, 2),
+    ]
+    if stdin_fd is not None:
+        file_actions.append((os.POSIX_SPAWN_DUP2, stdin_fd, 0))
+    pid = os.posix_spawn(argv[0], argv, os.environ, file_actions=file_actions)
+    _, status = os.waitpid(pid, 0)
+    return os.waitstatus_to_exitcode(status)
 
 
 def run_benchmark(
     cmd: list[str],
-    iterations: int = 10,
-    warmup: int = 2
+    min_iters: int = 5,
+    max_iters: int = 50,
+    budget_s: float = 3.0,
+    warmup: int = 2,
+    parallel_warmup: bool = False,
+    batch: int = 1,
+    stdin_path: Path | None = None,
+    out: TextIO | None = None,
 ) -> dict[str, float]:
     """
     Run a benchmark for the given command.
 
-    Returns dict with avg, min, max times in milliseconds.
+    If stdin_path is given the command reads it from stdin (``-``) through a
+    single preopened file descriptor, so the child does no open/stat of its
+    own and every run reads the same page-cached file.
+
+    With batch > 1 the command is passed ``--repeat batch`` (supported by the
+    Zig CLI) and each timing is divided by batch, amortising process creation
+    over many conversions.
+
+    The output is verified once up front; warmup and timed runs then go
+    through _fast_run with output sent to /dev/null, so neither pipe
+    draining nor Popen setup is part of the measurement.
+    Warmup runs are untimed, so with parallel_warmup they are dispatched
+    concurrently on a thread pool. Timed runs are always serial.
+
+    Timed runs are collected adaptively by sample(). Errors are written to
+    out (default stdout), so they stay with the section being buffered.
+
+    Returns dict with the sample count n and avg, min, max, p50, p95 times
+    in nanoseconds.
     """
+    out = out or sys.stdout
     times = []
+    if batch > 1:
+        cmd = cmd + ["--repeat", str(batch)]
 
-    # Warmup runs
-    for _ in range(warmup):
-        subprocess.run(cmd, capture_output=True, check=False)
+    stdin_fd = None
+    stdin_data = None
+    if stdin_path is not None:
+        cmd = cmd + ["-"]
+        stdin_data = stdin_path.read_bytes()
+        stdin_fd = os.open(stdin_path, os.O_RDONLY)
 
-    # Timed runs
-    for _ in range(iterations):
-        start = time.perf_counter()
-        result = subprocess.run(cmd, capture_output=True, check=False)
-        end = time.perf_counter()
+    try:
+        # Correctness check (untimed)
+        result = subprocess.run(cmd, input=stdin_data, capture_output=True, check=False)
+        if result.returncode != 0 or not result.stdout:
+            print(f"  Error: {result.stderr.decode().strip()}", file=out)
+            return summarize([])
+
+        # Warmup runs. Concurrent children can't share one fd offset, so the
+        # parallel path pipes the preloaded bytes to each child instead.
+        if parallel_warmup:
+            with _unpinned(), ThreadPoolExecutor(max_workers=_available_cpus()) as executor:
+                wait([
+                    executor.submit(
+                        subprocess.run, cmd, input=stdin_data,
+                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False,
+                    )
+                    for _ in range(warmup)
+                ])
+        else:
+            for _ in range(warmup):
+                _fast_run(cmd, stdin_fd)
+
+        # Timed runs
+        def run_once() -> int | None:
+            start = time.perf_counter_ns()
+            returncode = _fast_run(cmd, stdin_fd)
+            duration_ns = time.perf_counter_ns() - start
+
+            if returncode != 0:
+                print(f"  Error: {cmd[0]} exited with status {returncode}", file=out)
+                return None
+            return duration_ns // batch
+
+        times = sample(run_once, min_iters, max_iters, budget_s)
+    finally:
+        if stdin_fd is not None:
+            os.close(stdin_fd)
+
+    return summarize(times)
+
+
+def run_python_benchmark(
+    source: str | Path,
+    min_iters: int = 5,
+    max_iters: int = 50,
+    budget_s: float = 3.0,
+    warmup: int = 2,
+    out: TextIO | None = None,
+) -> dict[str, float]:
+    """
+    Run an in-process benchmark of the Python json2xml library.
 
-        if result.returncode != 0:
-            print(f"Error: {result.stderr.decode()}")
-            continue
+    source is either an inline JSON string or a path to a JSON file. The
+    file is read once up front; each timed call covers parsing and
+    conversion only, matching what the compiled CLIs spend their time on.
+    A failing conversion is reported to out (default stdout) and yields an
+    empty result, like a failing CLI in run_benchmark.
 
-        duration_ms = (end - start) * 1000
-        times.append(duration_ms)
+    Returns dict with the sample count n and avg, min, max, p50, p95 times
+    in nanoseconds.
+    """
+    out = out or sys.stdout
 
-    if not times:
-        return {"avg": 0, "min": 0, "max": 0}
+    def convert() -> None:
+        Json2xml(json.loads(data), wrapper="all", pretty=True, attr_type=True).to_xml()
 
-    return {
-        "avg": sum(times) / len(times),
-        "min": min(times),
-        "max": max(times),
-    }
+    # Timed runs
+    def run_once() -> int:
+        start = time.perf_counter_ns()
+        convert()
+        return time.perf_counter_ns() - start
 
+    try:
+        data = source.read_text() if isinstance(source, Path) else source
+
+        # Warmup runs
+        for _ in range(warmup):
+            convert()
+
+        return summarize(sample(run_once, min_iters, max_iters, budget_s))
+    except Exception as e:
+        print(f"  Error: {type(e).__name__}: {e}", file=out)
+        return summarize([])
+
+
+def benchmark_backend(
+    cmd: list[str] | None,
+    source: str | Path,
+    batch: int = 1,
+    stdin: bool = True,
+    parallel_warmup: bool = False,
+    min_iters: int = 5,
+    max_iters: int = 50,
+    budget_s: float = 3.0,
+    out: TextIO | None = None,
+) -> dict[str, float]:
+    """
+    Benchmark one backend on one input.
 
-def format_time(ms: float) -> str:
-    """Format time in milliseconds."""
-    if ms < 1:
-        return f"{ms * 1000:.2f}µs"
-    elif ms < 1000:
-        return f"{ms:.2f}ms"
+    cmd None means the in-process Python library. Otherwise an inline JSON
+    source is passed with -s, and a file source is fed on stdin when the
+    CLI supports ``-`` or passed as a path when stdin is False.
+    """
+    if cmd is None:
+        return run_python_benchmark(source, min_iters, max_iters, budget_s, out=out)
+    if isinstance(source, Path) and not stdin:
+        return run_benchmark(
+            cmd + [str(source)], min_iters, max_iters, budget_s,
+            parallel_warmup=parallel_warmup, batch=batch, out=out,
+        )
+    if isinstance(source, Path):
+        return run_benchmark(
+            cmd, min_iters, max_iters, budget_s,
+            parallel_warmup=parallel_warmup, batch=batch, stdin_path=source, out=out,
+        )
+    return run_benchmark(
+        cmd + ["-s", source], min_iters, max_iters, budget_s,
+        parallel_warmup=parallel_warmup, batch=batch, out=out,
+    )
+
+
+def format_time(ns: float) -> str:
+    """Format time given in nanoseconds."""
+    if ns < 1_000_000:
+        return f"{ns / 1_000:.2f}µs"
+    elif ns < 1_000_000_000:
+        return f"{ns / 1_000_000:.2f}ms"
     else:
-        return f"{ms / 1000:.2f}s"
+        return f"{ns / 1_000_000_000:.2f}s"
 
 
-def print_header(title: str) -> None:
+def print_header(title: str, out: TextIO | None = None) -> None:
     """Print a section header."""
-    print(colorize("=" * 60, Colors.BLUE))
-    print(colorize(f"  {title}", Colors.BOLD))
-    print(colorize("=" * 60, Colors.BLUE))
+    out = out or sys.stdout
+    out.write(_BAR)
+    out.write(f"{Colors.BOLD}  {title}{Colors.NC}\n")
+    out.write(_BAR)
 
 
-def print_result(name: str, result: dict[str, float], color: str = Colors.NC) -> None:
+def print_result(name: str, result: dict[str, float], color: str = Colors.NC, out: TextIO | None = None) -> None:
     """Print benchmark result."""
-    print(f"  {colorize(name, color)}:")
-    print(f"    Avg: {format_time(result['avg'])} | "
-          f"Min: {format_time(result['min'])} | "
-          f"Max: {format_time(result['max'])}")
+    out = out or sys.stdout
+    out.write(f"  {color}{name}{Colors.NC} (n={result['n']}):\n")
+    out.write(f"    Avg: {format_time(result['avg'])} | "
+              f"Min: {format_time(result['min'])} | "
+              f"Max: {format_time(result['max'])} | "
+              f"P50: {format_time(result['p50'])} | "
+              f"P95: {format_time(result['p95'])}\n")
+
+
+def compare(name: str, other: str, ratio: float, color: str = Colors.GREEN) -> str:
+    """Describe ratio (other's time / name's time) as faster or slower."""
+    if ratio >= 1:
+        return f"{name} is {color}{ratio:.1f}x faster{Colors.NC} than {other}"
+    return f"{name} is {Colors.RED}{1 / ratio:.1f}x slower{Colors.NC} than {other}"
+
+
+def flush_buffer(buf: io.StringIO) -> None:
+    """Write a buffered block of output to stdout in a single write."""
+    sys.stdout.write(buf.getvalue())
+    sys.stdout.flush()
+
+
+def _git_commit() -> str | None:
+    """Return the current commit of the repository, if available."""
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=BASE_DIR, capture_output=True, check=True
+        )
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return None
+    return result.stdout.decode().strip()
 
 
-def main() -> int:
+def _cpu_model() -> str:
+    """Return a human-readable CPU model name."""
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def _backend_mode(cmd: list[str] | None, source: str | Path, stdin: bool) -> str:
+    """Describe how benchmark_backend runs a backend on a source."""
+    if cmd is None:
+        return "in-process"
+    if isinstance(source, Path):
+        return "cli-stdin" if stdin else "cli-path"
+    return "cli-string"
+
+
+def write_results(
+    path: Path,
+    results: dict[str, dict[str, dict[str, float]]],
+    fixture_bytes: dict[str, int],
+    config: dict[str, object],
+    modes: dict[str, dict[str, tuple[str, int]]],
+) -> None:
+    """
+    Write benchmark results as a machine-readable JSON artifact.
+
+    config holds the sampling and timing options of the run. modes maps each
+    case and backend to how it was invoked and its --batch factor, so runs
+    with different settings are not compared as like for like.
+    """
+    artifact = {
+        "commit": _git_commit(),
+        "cpu_model": _cpu_model(),
+        "config": config,
+        "results": {
+            size: {
+                "fixture_bytes": fixture_bytes[size],
+                "backends": {
+                    name: {
+                        "mode": modes[size][name][0],
+                        "batch": modes[size][name][1],
+                        "avg_ns": r["avg"],
+                        "min_ns": r["min"],
+                        "max_ns": r["max"],
+                        "p50_ns": r["p50"],
+                        "p95_ns": r["p95"],
+                        "iterations": r["n"],
+                    }
+                    for name, r in data.items()
+                    if r["n"] > 0
+                },
+            }
+            for size, data in results.items()
+        },
+    }
+    if orjson is not None:
+        path.write_bytes(orjson.dumps(artifact, option=orjson.OPT_INDENT_2))
+    else:
+        path.write_text(json.dumps(artifact, indent=2))
+
+
+def _pin_and_prioritize() -> str | None:
+    """
+    Pin this process to one CPU and raise its scheduling priority.
+
+    Subprocesses inherit both the affinity mask and the scheduling policy,
+    so the benchmarked binaries run on the same core with the same priority.
+    The last allowed CPU is used to stay clear of CPU0, which usually takes
+    most interrupts. Returns a description of what was applied, or None on
+    platforms without sched_setaffinity.
+    """
+    global _UNPINNED_CPUS
+    if not hasattr(os, "sched_setaffinity"):
+        return None
+
+    _UNPINNED_CPUS = os.sched_getaffinity(0)
+    cpu = max(_UNPINNED_CPUS)
+    os.sched_setaffinity(0, {cpu})
+
+    try:
+        os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(50))
+        return f"CPU {cpu}, SCHED_FIFO"
+    except PermissionError:
+        pass
+    try:
+        os.nice(-5)
+        return f"CPU {cpu}, nice -5"
+    except PermissionError:
+        return f"CPU {cpu}"
+
+
+@contextmanager
+def _unpinned() -> Iterator[None]:
+    """
+    Temporarily restore the CPU mask from before _pin_and_prioritize.
+
+    Used around parallel warmup so its children can spread over every
+    allowed core instead of queueing on the pinned one.
+    """
+    if _UNPINNED_CPUS is None:
+        yield
+        return
+
+    pinned = os.sched_getaffinity(0)
+    os.sched_setaffinity(0, _UNPINNED_CPUS)
+    try:
+        yield
+    finally:
+        os.sched_setaffinity(0, pinned)
+
+
+def _available_cpus() -> int:
+    """Number of CPUs this process may currently run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def positive_int(value: str) -> int:
+    """argparse type for integers of at least 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected an integer, got {value!r}") from None
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+
+def positive_float(value: str) -> float:
+    """argparse type for numbers greater than 0."""
+    try:
+        number = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a number, got {value!r}") from None
+    if not number > 0:
+        raise argparse.ArgumentTypeError(f"must be greater than 0, got {value}")
+    return number
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description="Benchmark json2xml: Python vs Go vs Zig")
+    parser.add_argument(
+        "--parallel-warmup",
+        action="store_true",
+        help="Run untimed warmup invocations concurrently on a thread pool",
+    )
+    parser.add_argument(
+        "--include-startup",
+        action="store_true",
+        help="Benchmark Python through its CLI, including interpreter startup",
+    )
+    parser.add_argument(
+        "--batch",
+        type=positive_int,
+        default=1,
+        metavar="N",
+        help="Run N conversions per Zig process via --repeat and report the per-conversion time",
+    )
+    parser.add_argument(
+        "--min-iters", type=positive_int, default=5, help="Minimum timed runs per case (default: 5)"
+    )
+    parser.add_argument(
+        "--max-iters", type=positive_int, default=50, help="Maximum timed runs per case (default: 50)"
+    )
+    parser.add_argument(
+        "--budget",
+        type=positive_float,
+        default=3.0,
+        metavar="SECONDS",
+        help="Stop sampling a case after this much time, once --min-iters runs are in (default: 3.0)",
+    )
+    args = parser.parse_args(argv)
+    if args.min_iters > args.max_iters:
+        parser.error("--min-iters must not exceed --max-iters")
+    return args
+
+
+def main(argv: list[str] | None = None) -> int:
     """Run the benchmark suite."""
+    args = parse_args(argv)
+    cache_dir = Path(os.environ.get("XDG_CACHE_HOME", "~/.cache")).expanduser() / "json2xml-bench"
+    cache_dir.mkdir(parents=True, exist_ok=True)
     print_header("json2xml Benchmark: Python vs Go vs Zig")
     print()
 
     # Check prerequisites
-    print(colorize("Checking prerequisites...", Colors.YELLOW))
+    print(f"{Colors.YELLOW}Checking prerequisites...{Colors.NC}")
 
     # Check Python json2xml
-    try:
-        result = subprocess.run(
-            [sys.executable, "-c", "import json2xml; print('ok')"],
-            capture_output=True, check=True
-        )
-        print(colorize("✓ Python json2xml found", Colors.GREEN))
-    except (subprocess.CalledProcessError, FileNotFoundError):
-        print(colorize("✗ Python json2xml not found. Install with: pip install json2xml", Colors.RED))
+    if Json2xml is None:
+        print(f"{Colors.RED}✗ Python json2xml not found. Install with: pip install json2xml{Colors.NC}")
         return 1
+    print(f"{Colors.GREEN}✓ Python json2xml found{Colors.NC}")
 
     # Check Go binary
     if not GO_CLI.exists():
-        print(colorize(f"✗ Go binary not found at {GO_CLI}", Colors.RED))
+        print(f"{Colors.RED}✗ Go binary not found at {GO_CLI}{Colors.NC}")
         print("  Please build it first: cd ~/projects/go/json2xml-go && make")
         go_available = False
     else:
-        print(colorize(f"✓ Go binary found at {GO_CLI}", Colors.GREEN))
+        print(f"{Colors.GREEN}✓ Go binary found at {GO_CLI}{Colors.NC}")
         go_available = True
 
     # Check Zig binary
     if not ZIG_CLI.exists():
-        print(colorize(f"✗ Zig binary not found at {ZIG_CLI}", Colors.RED))
+        print(f"{Colors.RED}✗ Zig binary not found at {ZIG_CLI}{Colors.NC}")
         print("  Building Zig binary...")
         result = subprocess.run(
             ["zig", "build", "-Doptimize=ReleaseFast"],
@@ -182,166 +755,153 @@ def main() -> int:
             capture_output=True
         )
         if result.returncode != 0:
-            print(colorize(f"  Failed to build: {result.stderr.decode()}", Colors.RED))
+            print(f"{Colors.RED}  Failed to build: {result.stderr.decode()}{Colors.NC}")
             return 1
-        print(colorize("✓ Zig binary built successfully", Colors.GREEN))
+        print(f"{Colors.GREEN}✓ Zig binary built successfully{Colors.NC}")
     else:
-        print(colorize(f"✓ Zig binary found at {ZIG_CLI}", Colors.GREEN))
+        print(f"{Colors.GREEN}✓ Zig binary found at {ZIG_CLI}{Colors.NC}")
+
+    # Pin after the Zig build so the build itself can use every core
+    pinned = _pin_and_prioritize()
+    if pinned:
+        print(f"{Colors.GREEN}✓ Pinned benchmark to {pinned}{Colors.NC}")
 
     print()
 
     # Test configurations
-    iterations = 10
+    sampling = {"min_iters": args.min_iters, "max_iters": args.max_iters, "budget_s": args.budget}
     results = {}
+    modes = {}
 
-    # Create temp files for testing
-    with tempfile.TemporaryDirectory() as tmpdir:
-        # Small JSON - inline string
-        small_json = '{"name": "John", "age": 30, "city": "New York"}'
-
-        # Medium JSON - existing file
-        medium_json_file = EXAMPLES_DIR / "bigexample.json"
-        if not medium_json_file.exists():
-            print(colorize(f"Warning: {medium_json_file} not found, skipping medium test", Colors.YELLOW))
-            medium_json_file = None
-
-        # Large JSON - generated
-        large_json = generate_large_json(1000)
-        large_json_file = Path(tmpdir) / "large.json"
-        large_json_file.write_text(large_json)
-
-        # Very large JSON
-        very_large_json = generate_large_json(5000)
-        very_large_json_file = Path(tmpdir) / "very_large.json"
-        very_large_json_file.write_text(very_large_json)
-
-        print(colorize("Test file sizes:", Colors.CYAN))
-        print(f"  Small:      {len(small_json)} bytes (inline)")
-        if medium_json_file:
-            print(f"  Medium:     {medium_json_file.stat().st_size:,} bytes")
-        print(f"  Large:      {large_json_file.stat().st_size:,} bytes (1000 records)")
-        print(f"  Very Large: {very_large_json_file.stat().st_size:,} bytes (5000 records)")
-        print()
-
-        # Benchmark: Small JSON (inline string)
-        print(colorize("--- Small JSON (inline string) ---", Colors.BLUE))
-        py_small = run_benchmark(PYTHON_CLI + ["-s", small_json], iterations)
-        print_result("Python", py_small, Colors.YELLOW)
-        
-        if go_available:
-            go_small = run_benchmark([str(GO_CLI), "-s", small_json], iterations)
-            print_result("Go", go_small, Colors.CYAN)
-        else:
-            go_small = {"avg": 0, "min": 0, "max": 0}
-            
-        zig_small = run_benchmark([str(ZIG_CLI), "-s", small_json], iterations)
-        print_result("Zig", zig_small, Colors.MAGENTA)
-        results["small"] = {"python": py_small, "go": go_small, "zig": zig_small}
-        print()
-
-        # Benchmark: Medium JSON (file)
-        if medium_json_file:
-            print(colorize("--- Medium JSON (bigexample.json) ---", Colors.BLUE))
-            py_medium = run_benchmark(PYTHON_CLI + [str(medium_json_file)], iterations)
-            print_result("Python", py_medium, Colors.YELLOW)
-            
-            if go_available:
-                go_medium = run_benchmark([str(GO_CLI), str(medium_json_file)], iterations)
-                print_result("Go", go_medium, Colors.CYAN)
-            else:
-                go_medium = {"avg": 0, "min": 0, "max": 0}
-                
-            zig_medium = run_benchmark([str(ZIG_CLI), str(medium_json_file)], iterations)
-            print_result("Zig", zig_medium, Colors.MAGENTA)
-            results["medium"] = {"python": py_medium, "go": go_medium, "zig": zig_medium}
-            print()
-
-        # Benchmark: Large JSON (file)
-        print(colorize("--- Large JSON (1000 records) ---", Colors.BLUE))
-        py_large = run_benchmark(PYTHON_CLI + [str(large_json_file)], iterations)
-        print_result("Python", py_large, Colors.YELLOW)
-        
-        if go_available:
-            go_large = run_benchmark([str(GO_CLI), str(large_json_file)], iterations)
-            print_result("Go", go_large, Colors.CYAN)
-        else:
-            go_large = {"avg": 0, "min": 0, "max": 0}
-            
-        zig_large = run_benchmark([str(ZIG_CLI), str(large_json_file)], iterations)
-        print_result("Zig", zig_large, Colors.MAGENTA)
-        results["large"] = {"python": py_large, "go": go_large, "zig": zig_large}
-        print()
-
-        # Benchmark: Very Large JSON (file)
-        print(colorize("--- Very Large JSON (5000 records) ---", Colors.BLUE))
-        py_vlarge = run_benchmark(PYTHON_CLI + [str(very_large_json_file)], iterations)
-        print_result("Python", py_vlarge, Colors.YELLOW)
-        
-        if go_available:
-            go_vlarge = run_benchmark([str(GO_CLI), str(very_large_json_file)], iterations)
-            print_result("Go", go_vlarge, Colors.CYAN)
-        else:
-            go_vlarge = {"avg": 0, "min": 0, "max": 0}
-            
-        zig_vlarge = run_benchmark([str(ZIG_CLI), str(very_large_json_file)], iterations)
-        print_result("Zig", zig_vlarge, Colors.MAGENTA)
-        results["very_large"] = {"python": py_vlarge, "go": go_vlarge, "zig": zig_vlarge}
-        print()
-
-    # Summary
-    print_header("SUMMARY")
+    # Small JSON - inline string
+    small_json = '{"name": "John", "age": 30, "city": "New York"}'
+
+    # Medium JSON - existing file
+    medium_json_file = EXAMPLES_DIR / "bigexample.json"
+    if not medium_json_file.exists():
+        print(f"{Colors.YELLOW}Warning: {medium_json_file} not found, skipping medium test{Colors.NC}")
+        medium_json_file = None
+
+    # Large JSON - generated once, then reused from the cache
+    large_json_file = get_or_create_fixture(1000, cache_dir)
+
+    # Very large JSON
+    very_large_json_file = get_or_create_fixture(5000, cache_dir)
+
+    fixture_bytes = {
+        "small": len(small_json.encode()),
+        "large": large_json_file.stat().st_size,
+        "very_large": very_large_json_file.stat().st_size,
+    }
+    if medium_json_file:
+        fixture_bytes["medium"] = medium_json_file.stat().st_size
+
+    print(f"{Colors.CYAN}Test file sizes:{Colors.NC}")
+    print(f"  Small:      {fixture_bytes['small']} bytes (inline)")
+    if medium_json_file:
+        print(f"  Medium:     {fixture_bytes['medium']:,} bytes")
+    print(f"  Large:      {fixture_bytes['large']:,} bytes (1000 records)")
+    print(f"  Very Large: {fixture_bytes['very_large']:,} bytes (5000 records)")
     print()
 
+    # Backends to compare: (name, command, color, batch, stdin). A None
+    # command runs the Python library in-process. Only the Zig CLI supports
+    # --repeat. stdin marks CLIs known to read "-" from stdin; the Go CLI
+    # lives in another repository, so it keeps getting the file path.
+    backends: list[tuple[str, list[str] | None, str, int, bool]] = [
+        ("Python", PYTHON_CLI if args.include_startup else None, Colors.YELLOW, 1, True),
+    ]
+    if go_available:
+        backends.append(("Go", [str(GO_CLI)], Colors.CYAN, 1, False))
+    backends.append(("Zig", [str(ZIG_CLI)], Colors.MAGENTA, args.batch, True))
+
+    cases: list[tuple[str, str, str | Path]] = [("small", "Small JSON (inline string)", small_json)]
+    if medium_json_file:
+        cases.append(("medium", "Medium JSON (bigexample.json)", medium_json_file))
+    cases.append(("large", "Large JSON (1000 records)", large_json_file))
+    cases.append(("very_large", "Very Large JSON (5000 records)", very_large_json_file))
+
+    # Each section is buffered and written to stdout in one go
+    for size, title, source in cases:
+        buf = io.StringIO()
+        print(f"{Colors.BLUE}--- {title} ---{Colors.NC}", file=buf)
+        results[size] = {}
+        modes[size] = {}
+        for name, cmd, color, batch, stdin in backends:
+            r = benchmark_backend(cmd, source, batch, stdin, args.parallel_warmup, **sampling, out=buf)
+            print_result(name, r, color, out=buf)
+            results[size][name.lower()] = r
+            modes[size][name.lower()] = (_backend_mode(cmd, source, stdin), batch)
+        print(file=buf)
+        flush_buffer(buf)
+
+    # Summary, buffered and written to stdout in one go
+    buf = io.StringIO()
+    print_header("SUMMARY", out=buf)
+    print(file=buf)
+
+    # In-process Python timings exclude process startup while the Go and Zig
+    # rows include it, so speedups against Python are only meaningful with
+    # --include-startup.
+    compare_python = args.include_startup
+    notes = []
+    if not compare_python:
+        notes.append("Python is timed in-process; pass --include-startup to compare it with Go and Zig.")
+
+    # With --batch the Zig row is a per-conversion time with process startup
+    # amortised away, while Python and Go are still one process per run.
+    compare_go = go_available and args.batch == 1
+    if go_available:
+        notes.append("For file inputs Zig reads stdin while Go opens the path itself.")
+    if args.batch > 1:
+        notes.append("Zig is timed per conversion with --batch, so it is not compared with per-process rows.")
+    if notes:
+        buf.write("\n".join(notes) + "\n\n")
+
     for size, data in results.items():
         py_avg = data["python"]["avg"]
-        go_avg = data["go"]["avg"]
-        zig_avg = data["zig"]["avg"]
-
-        print(colorize(f"{size.replace('_', ' ').title()} JSON:", Colors.BOLD))
-        print(f"  {colorize('Python', Colors.YELLOW)}: {format_time(py_avg)}")
-        
-        if go_avg > 0:
-            print(f"  {colorize('Go', Colors.CYAN)}:     {format_time(go_avg)}")
-            go_speedup = py_avg / go_avg if go_avg > 0 else 0
-            print(f"         Go is {colorize(f'{go_speedup:.1f}x faster', Colors.GREEN)} than Python")
-        
-        print(f"  {colorize('Zig', Colors.MAGENTA)}:    {format_time(zig_avg)}")
-        zig_speedup = py_avg / zig_avg if zig_avg > 0 else 0
-        print(f"         Zig is {colorize(f'{zig_speedup:.1f}x faster', Colors.GREEN)} than Python")
-        
-        if go_avg > 0 and zig_avg > 0:
-            zig_vs_go = go_avg / zig_avg
-            if zig_vs_go > 1:
-                print(f"         Zig is {colorize(f'{zig_vs_go:.1f}x faster', Colors.GREEN)} than Go")
-            else:
-                print(f"         Go is {colorize(f'{1/zig_vs_go:.1f}x faster', Colors.CYAN)} than Zig")
-        print()
 
-    # Overall average speedup
-    total_py = sum(r["python"]["avg"] for r in results.values())
-    total_go = sum(r["go"]["avg"] for r in results.values() if r["go"]["avg"] > 0)
-    total_zig = sum(r["zig"]["avg"] for r in results.values())
-    
-    print(colorize("Overall Performance:", Colors.BOLD))
-    if total_go > 0:
-        overall_go_speedup = total_py / total_go
-        print(f"  Go is {colorize(f'{overall_go_speedup:.1f}x faster', Colors.CYAN)} than Python")
-    
-    if total_zig > 0:
-        overall_zig_speedup = total_py / total_zig
-        print(f"  Zig is {colorize(f'{overall_zig_speedup:.1f}x faster', Colors.MAGENTA)} than Python")
-        
-        if total_go > 0:
-            zig_vs_go_overall = total_go / total_zig
-            if zig_vs_go_overall > 1:
-                print(f"  Zig is {colorize(f'{zig_vs_go_overall:.1f}x faster', Colors.MAGENTA)} than Go")
-            else:
-                print(f"  Go is {colorize(f'{1/zig_vs_go_overall:.1f}x faster', Colors.CYAN)} than Zig")
+        print(f"{Colors.BOLD}{size.replace('_', ' ').title()} JSON:{Colors.NC}", file=buf)
+        for name, _, color, batch, _ in backends:
+            avg = data[name.lower()]["avg"]
+            print(f"  {color}{name}{Colors.NC}:{' ' * (7 - len(name))}{format_time(avg)}", file=buf)
+            if compare_python and name != "Python" and batch == 1 and avg > 0 and py_avg > 0:
+                print(f"         {compare(name, 'Python', py_avg / avg)}", file=buf)
 
-    print()
-    print(colorize("=" * 60, Colors.BLUE))
-    print(colorize("Benchmark complete!", Colors.GREEN))
-    print(colorize("=" * 60, Colors.BLUE))
+        if compare_go and data["go"]["avg"] > 0 and data["zig"]["avg"] > 0:
+            print(f"         {compare('Zig', 'Go', data['go']['avg'] / data['zig']['avg'])}", file=buf)
+        print(file=buf)
+
+    # Overall average speedup
+    totals = {name.lower(): sum(data[name.lower()]["avg"] for data in results.values()) for name, *_ in backends}
+
+    print(f"{Colors.BOLD}Overall Performance:{Colors.NC}", file=buf)
+    if compare_python:
+        for name, _, color, batch, _ in backends[1:]:
+            if batch == 1 and totals[name.lower()] > 0 and totals["python"] > 0:
+                print(f"  {compare(name, 'Python', totals['python'] / totals[name.lower()], color)}", file=buf)
+
+    if compare_go and totals["go"] > 0 and totals["zig"] > 0:
+        print(f"  {compare('Zig', 'Go', totals['go'] / totals['zig'], Colors.MAGENTA)}", file=buf)
+
+    print(file=buf)
+    buf.write(_BAR)
+    print(f"{Colors.GREEN}Benchmark complete!{Colors.NC}", file=buf)
+    buf.write(_BAR)
+    flush_buffer(buf)
+
+    out_path = os.environ.get("JSON2XML_BENCH_OUT")
+    if out_path:
+        config = {
+            "batch": args.batch,
+            "include_startup": args.include_startup,
+            "parallel_warmup": args.parallel_warmup,
+            "min_iters": args.min_iters,
+            "max_iters": args.max_iters,
+            "budget_s": args.budget,
+        }
+        write_results(Path(out_path), results, fixture_bytes, config, modes)
+        print(f"Results written to {out_path}")
 
     return 0
 
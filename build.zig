@@ -35,6 +35,18 @@ pub fn build(b: *std.Build) void {
     });
 
     const run_lib_tests = b.addRunArtifact(lib_tests);
+
+    // Unit tests for the CLI
+    const cli_tests = b.addTest(.{
+        .root_module = b.createModule(.{
+            .root_source_file = b.path("src/main_test.zig"),
+            .target = target,
+            .optimize = optimize,
+        }),
+    });
+
+    const run_cli_tests = b.addRunArtifact(cli_tests);
     const test_step = b.step("test", "Run unit tests");
     test_step.dependOn(&run_lib_tests.step);
+    test_step.dependOn(&run_cli_tests.step);
 }
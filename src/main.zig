@@ -22,6 +22,10 @@ const std = @import("std");
 // its `pub` (public) declarations. Non-pub items remain private to that file.
 const json2xml = @import("json2xml.zig");
 
+// Largest input accepted from a file or stdin (100 MB). Both paths share one
+// limit so piping a fixture behaves the same as passing its path.
+const max_input_bytes = 100 * 1024 * 1024;
+
 // -----------------------------------------------------------------------------
 // STRUCT DEFINITION WITH DEFAULT VALUES
 // -----------------------------------------------------------------------------
@@ -34,7 +38,9 @@ const json2xml = @import("json2xml.zig");
 //   - null (no value present)
 //   - An actual value of that type
 // This is Zig's way of handling nullable values safely at compile time.
-const CliOptions = struct {
+//
+// `pub` makes it visible to main_test.zig, which imports this file.
+pub const CliOptions = struct {
     // ?[]const u8 means: optional slice of constant bytes (a string, basically)
     // []const u8 is Zig's string type - a slice (pointer + length) of bytes
     // The ? prefix makes it nullable, defaulting to null
@@ -53,6 +59,11 @@ const CliOptions = struct {
     xpath_format: bool = false,
     cdata: bool = false,
     list_headers: bool = false,
+
+    // usize is an unsigned integer the size of a pointer. The conversion is
+    // run this many times per process, which lets benchmarks amortise the
+    // cost of process creation over many conversions.
+    repeat: usize = 1,
 };
 
 // -----------------------------------------------------------------------------
@@ -96,13 +107,6 @@ pub fn main() !void {
     // -------------------------------------------------------------------------
     const input_data = try readInput(allocator, opts);
 
-    // -------------------------------------------------------------------------
-    // USING THE STANDARD LIBRARY JSON PARSER
-    // -------------------------------------------------------------------------
-    // parseFromSlice parses a JSON string into a Value type.
-    const parsed = try std.json.parseFromSlice(std.json.Value, allocator, input_data, .{});
-    // No defer deinit needed - arena handles cleanup
-
     // -------------------------------------------------------------------------
     // STRUCT INITIALIZATION WITH NAMED FIELDS
     // -------------------------------------------------------------------------
@@ -120,8 +124,29 @@ pub fn main() !void {
     // Estimate output size: XML is typically 2-3x larger than JSON
     const estimated_size = input_data.len * (if (opts.pretty) @as(usize, 3) else @as(usize, 2));
 
-    // Convert JSON to XML using our library with size hint
-    const output = try json2xml.toXmlWithCapacity(allocator, parsed.value, xml_options, estimated_size);
+    // -------------------------------------------------------------------------
+    // REPEATED CONVERSION WITH A RESETTABLE ARENA
+    // -------------------------------------------------------------------------
+    // Each conversion gets its own arena. reset(.retain_capacity) frees all
+    // allocations from the previous pass but keeps the pages, so later passes
+    // don't go back to the OS. The output of the last pass stays valid until
+    // the deferred deinit runs.
+    var run_arena = std.heap.ArenaAllocator.init(std.heap.page_allocator);
+    defer run_arena.deinit();
+
+    var output: []const u8 = undefined;
+    var n: usize = 0;
+    while (n < opts.repeat) : (n += 1) {
+        _ = run_arena.reset(.retain_capacity);
+        const run_allocator = run_arena.allocator();
+
+        // parseFromSlice parses a JSON string into a Value type.
+        const parsed = try std.json.parseFromSlice(std.json.Value, run_allocator, input_data, .{});
+        // No defer deinit needed - arena handles cleanup
+
+        // Convert JSON to XML using our library with size hint
+        output = try json2xml.toXmlWithCapacity(run_allocator, parsed.value, xml_options, estimated_size);
+    }
 
     // Write the result to stdout or a file
     try writeOutput(output, opts);
@@ -140,7 +165,7 @@ pub fn main() !void {
 //     The * means we receive a pointer, so we can modify the original.
 //
 // Return type: void - this function cannot fail (no ! prefix).
-fn parseArgs(args: [][:0]u8, opts: *CliOptions) void {
+pub fn parseArgs(args: [][:0]u8, opts: *CliOptions) void {
     // -------------------------------------------------------------------------
     // WHILE LOOP WITH UPDATE CLAUSE
     // -------------------------------------------------------------------------
@@ -168,6 +193,13 @@ fn parseArgs(args: [][:0]u8, opts: *CliOptions) void {
                 opts.output_file = args[i + 1];
                 i += 1;
             }
+        } else if (std.mem.eql(u8, arg, "-n") or std.mem.eql(u8, arg, "--repeat")) {
+            if (i + 1 < args.len) {
+                // parseInt returns an error union; `catch 1` falls back to a
+                // single run on malformed input. @max keeps at least one pass.
+                opts.repeat = @max(std.fmt.parseInt(usize, args[i + 1], 10) catch 1, 1);
+                i += 1;
+            }
         } else if (std.mem.eql(u8, arg, "-w") or std.mem.eql(u8, arg, "--wrapper")) {
             if (i + 1 < args.len) {
                 opts.wrapper = args[i + 1];
@@ -189,8 +221,9 @@ fn parseArgs(args: [][:0]u8, opts: *CliOptions) void {
             opts.cdata = true;
         } else if (std.mem.eql(u8, arg, "-l") or std.mem.eql(u8, arg, "--list-headers")) {
             opts.list_headers = true;
-        } else if (!std.mem.startsWith(u8, arg, "-")) {
-            // Positional argument (not starting with -) is treated as input file
+        } else if (std.mem.eql(u8, arg, "-") or !std.mem.startsWith(u8, arg, "-")) {
+            // Positional argument (not starting with -) is treated as input file.
+            // A bare "-" is also positional: it means read from stdin.
             opts.input_file = arg;
         }
     }
@@ -252,12 +285,12 @@ fn readInput(allocator: std.mem.Allocator, opts: CliOptions) ![]u8 {
         if (std.mem.eql(u8, path, "-")) {
             const stdin = std.fs.File.stdin();
             // readToEndAlloc reads until EOF, allocating memory as needed.
-            // The second arg is max bytes to read (10 MB here).
-            return stdin.readToEndAlloc(allocator, 10 * 1024 * 1024);
+            // The second arg is max bytes to read.
+            return stdin.readToEndAlloc(allocator, max_input_bytes);
         }
         // Read from file. cwd() returns the current working directory.
         // readFileAlloc reads the entire file into allocated memory.
-        return std.fs.cwd().readFileAlloc(allocator, path, 100 * 1024 * 1024);
+        return std.fs.cwd().readFileAlloc(allocator, path, max_input_bytes);
     }
 
     // -------------------------------------------------------------------------
@@ -324,6 +357,7 @@ fn printUsage() void {
         \\  -x, --xpath             Use XPath 3.1 json-to-xml format
         \\  -c, --cdata             Wrap string values in CDATA sections
         \\  -l, --list-headers      Repeat headers for each list item
+        \\  -n, --repeat int        Run the conversion N times, output once (benchmarking)
         \\  -h, --help              Show help message
         \\
     ;
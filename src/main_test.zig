@@ -0,0 +1,63 @@
+const std = @import("std");
+const cli = @import("main.zig");
+const testing = std.testing;
+
+// Helper to run parseArgs over string literals. parseArgs takes mutable
+// sentinel-terminated slices, as returned by std.process.argsAlloc.
+fn parse(comptime argv: []const []const u8) cli.CliOptions {
+    var storage: [argv.len][64:0]u8 = undefined;
+    var args: [argv.len][:0]u8 = undefined;
+    inline for (argv, 0..) |arg, i| {
+        @memcpy(storage[i][0..arg.len], arg);
+        storage[i][arg.len] = 0;
+        args[i] = storage[i][0..arg.len :0];
+    }
+
+    var opts = cli.CliOptions{};
+    cli.parseArgs(&args, &opts);
+    return opts;
+}
+
+// ============================================
+// Input Argument Tests
+// ============================================
+
+test "parse file path as input file" {
+    const opts = parse(&.{ "json2xml-zig", "data.json" });
+    try testing.expectEqualStrings("data.json", opts.input_file.?);
+}
+
+test "parse bare dash as stdin input" {
+    const opts = parse(&.{ "json2xml-zig", "-" });
+    try testing.expectEqualStrings("-", opts.input_file.?);
+}
+
+test "parse dash after flags as stdin input" {
+    const opts = parse(&.{ "json2xml-zig", "--repeat", "5", "-" });
+    try testing.expectEqualStrings("-", opts.input_file.?);
+    try testing.expectEqual(@as(usize, 5), opts.repeat);
+}
+
+test "parse unknown flag is not treated as input file" {
+    const opts = parse(&.{ "json2xml-zig", "--unknown" });
+    try testing.expect(opts.input_file == null);
+}
+
+// ============================================
+// Repeat Argument Tests
+// ============================================
+
+test "parse repeat zero falls back to one" {
+    const opts = parse(&.{ "json2xml-zig", "--repeat", "0" });
+    try testing.expectEqual(@as(usize, 1), opts.repeat);
+}
+
+test "parse non-numeric repeat falls back to one" {
+    const opts = parse(&.{ "json2xml-zig", "-n", "abc" });
+    try testing.expectEqual(@as(usize, 1), opts.repeat);
+}
+
+test "parse repeat without value falls back to one" {
+    const opts = parse(&.{ "json2xml-zig", "--repeat" });
+    try testing.expectEqual(@as(usize, 1), opts.repeat);
+}